@@ -1,12 +1,32 @@
 import os
+import argparse
+from contextlib import closing
 import pandas as pd
 from tkinter import filedialog, Tk, messagebox
 import json
-from datetime import datetime
 
 # 导入拆分的模块
 from pdf_extractor import extract_pdf_info
 from word_extractor import extract_word_info
+from search_index import open_index, index_record
+from job_journal import (
+    STATE_DISCOVERED,
+    STATE_FAILED,
+    STATE_UPLOADED,
+    open_journal,
+    create_job,
+    get_job,
+    get_job_files,
+    mark_file_extracted,
+    mark_file_failed,
+    mark_files_written,
+    set_upload_target,
+    enqueue_uploads,
+    get_pending_uploads,
+    mark_uploaded,
+    mark_upload_failed,
+    mark_upload_rejected
+)
 from feishu_uploader import (
     get_tenant_access_token,
     create_new_bitable,
@@ -17,10 +37,13 @@ from feishu_uploader import (
     get_existing_tables
 )
 
+# 飞书批量新增记录接口单次最多500条
+UPLOAD_BATCH_SIZE = 500
+
 def get_file_extractor(file_path):
     """根据文件扩展名返回对应的解析器"""
     file_ext = os.path.splitext(file_path)[1].lower()
-    
+
     if file_ext == '.pdf':
         return extract_pdf_info
     elif file_ext in ['.docx', '.doc']:
@@ -28,50 +51,47 @@ def get_file_extractor(file_path):
     else:
         return None
 
-def main():
-    """主函数 - 程序入口点"""
-    
-    # 检查配置文件
-    config_file = "feishu_config.json"
+def load_config(config_file="feishu_config.json"):
+    """读取飞书配置文件，失败时返回None"""
     if not os.path.exists(config_file):
         print("❌ 配置文件不存在，请先配置飞书应用信息")
         print("请创建 feishu_config.json 文件并填写以下内容：")
         print("""
 {
     "app_id": "your_app_id",
-    "app_secret": "your_app_secret"
+    "app_secret": "your_app_secret",
+    "app_token": "your_app_token"
 }
 """)
-        return
-    
-    # 读取配置
+        return None
+
     try:
         with open(config_file, 'r', encoding='utf-8') as f:
             config = json.load(f)
-        app_id = config.get('app_id')
-        app_secret = config.get('app_secret')
-        
-        if not app_id or not app_secret:
+
+        if not config.get('app_id') or not config.get('app_secret'):
             print("❌ 配置文件缺少 app_id 或 app_secret")
-            return
+            return None
+        return config
     except Exception as e:
         print(f"❌ 读取配置文件出错: {e}")
-        return
+        return None
 
-    # 选择文件或文件夹
+def select_files():
+    """通过图形界面选择文件或文件夹，返回待处理文件列表"""
     root = Tk()
     root.withdraw()  # 隐藏主窗口
-    
+
     choice = messagebox.askquestion(
-        "选择处理方式", 
+        "选择处理方式",
         "请选择处理方式：\n\n"
         "是(Y) - 选择文件夹（批量处理所有PDF和Word文件）\n"
         "否(N) - 选择单个或多个文件",
         icon='question'
     )
-    
+
     files_to_process = []
-    
+
     if choice == 'yes':  # 批量处理文件夹
         folder_path = filedialog.askdirectory(title="选择包含PDF和Word文件的文件夹")
         if folder_path:
@@ -84,72 +104,40 @@ def main():
                 print(f"📁 找到 {len(files_to_process)} 个文件（PDF和Word）")
             else:
                 print("❌ 文件夹中没有PDF或Word文件")
-                root.destroy()
-                return
     else:  # 处理单个或多个文件
         messagebox.showinfo("选择文件", "请选择要处理的PDF或Word文件")
         files_to_process = filedialog.askopenfilenames(
             title="选择PDF或Word文件",
             filetypes=[
-                ("PDF文件", "*.pdf"), 
-                ("Word文件", "*.docx"), 
+                ("PDF文件", "*.pdf"),
+                ("Word文件", "*.docx"),
                 ("Word文件", "*.doc"),
                 ("所有文件", "*.*")
             ]
         )
-    
+
     root.destroy()
-    
-    if not files_to_process:
-        print("❌ 未选择任何文件")
-        return
+    return [os.path.abspath(f) for f in files_to_process]
 
-    # 处理每个文件
-    results = []
-    
-    for file_path in files_to_process:
-        print(f"\n📄 正在处理: {os.path.basename(file_path)}")
-        
-        # 根据文件类型选择解析器
-        extractor = get_file_extractor(file_path)
-        if not extractor:
-            print(f"❌ 不支持的文件类型: {os.path.splitext(file_path)[1]}")
-            continue
-        
-        # 提取文件信息
-        try:
-            file_info = extractor(file_path)
-            if file_info:
-                results.append(file_info)
-                print(f"✅ 成功提取信息")
-            else:
-                print(f"❌ 无法提取信息")
-        except Exception as e:
-            print(f"❌ 处理文件时出错: {str(e)}")
-    
-    if not results:
-        print("❌ 没有成功处理任何文件")
-        return
+def ensure_table_fields(journal, job_id, target, token):
+    """确保新建的多维表格已创建字段；失败时表格仍保存在任务中，下次在同一张表上重试"""
+    if target.get("fields_created", True):
+        return target
 
-    # 保存到CSV文件
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    csv_filename = f"PDF提取结果_{timestamp}.csv"
-    
-    df = pd.DataFrame(results)
-    df.to_csv(csv_filename, index=False, encoding='utf-8-sig')
-    print(f"\n💾 结果已保存到: {csv_filename}")
-    
-    # 获取访问令牌
-    print("\n🔑 获取飞书访问令牌...")
-    token = get_tenant_access_token(app_id, app_secret)
-    if not token:
-        print("❌ 获取访问令牌失败")
-        return
-    
-    # 选择上传方式
+    if not create_table_fields(target["app_token"], target["table_id"], token):
+        print("❌ 创建表格字段失败")
+        return None
+
+    target = dict(target, fields_created=True)
+    if not set_upload_target(journal, job_id, target):
+        return None
+    return target
+
+def choose_upload_target(journal, job_id, app_token, token):
+    """选择上传目标（新建多维表格或已有知识库表格）并保存到任务中，失败时返回None"""
     root = Tk()
     root.withdraw()
-    
+
     upload_choice = messagebox.askquestion(
         "上传方式",
         "请选择上传方式：\n\n"
@@ -157,62 +145,287 @@ def main():
         "否(N) - 上传到飞书知识库表格",
         icon='question'
     )
-    
+
     root.destroy()
-    
+
     if upload_choice == 'yes':
-        # 上传到多维表格
-        print("\n📊 上传到飞书多维表格...")
-        
         # 创建新的多维表格
-        bitable_info = create_new_bitable(token, "PDF信息提取结果")
-        if not bitable_info:
+        print("\n📊 上传到飞书多维表格...")
+        table_id = create_new_bitable(app_token, token, "PDF信息提取结果")
+        if not table_id:
             print("❌ 创建多维表格失败")
-            return
-        
-        app_token = bitable_info['app_token']
-        table_id = bitable_info['table_id']
-        
+            return None
+
+        # 建表后立即保存，字段创建失败时重试也不会再建新表
+        target = {"type": "bitable", "app_token": app_token, "table_id": table_id, "fields_created": False}
+        if not set_upload_target(journal, job_id, target):
+            return None
+
         # 创建表格字段
-        if not create_table_fields(token, app_token, table_id):
-            print("❌ 创建表格字段失败")
-            return
-        
-        # 添加记录
-        if add_records_to_bitable(token, app_token, table_id, results):
-            print("✅ 数据上传成功")
+        return ensure_table_fields(journal, job_id, target, token)
+
+    # 上传到知识库表格
+    print("\n📚 上传到飞书知识库表格...")
+
+    # 获取现有表格列表
+    tables = get_existing_tables(app_token, token)
+    if not tables:
+        print("❌ 获取知识库表格列表失败")
+        return None
+
+    # 选择表格
+    print("\n📋 可用表格列表：")
+    for i, table in enumerate(tables, 1):
+        print(f"{i}. {table['name']}")
+
+    try:
+        choice = int(input("\n请选择要上传的表格编号: ")) - 1
+    except ValueError:
+        print("❌ 请输入有效的数字")
+        return None
+
+    if not 0 <= choice < len(tables):
+        print("❌ 无效的选择")
+        return None
+
+    target = {"type": "wiki", "app_token": app_token, "table_id": tables[choice]['table_id']}
+    if not set_upload_target(journal, job_id, target):
+        return None
+    return target
+
+def print_pending_hint(job_id, count):
+    """提示仍留在待上传队列中的记录可以补传"""
+    print(f"⚠️ 任务 {job_id} 仍有 {count} 条记录待上传，可运行 python create_feishu_table.py upload-pending 补传")
+
+def upload_job_records(journal, job_id, token, config):
+    """分批上传任务待上传队列中的记录，成功的移出队列，失败的保留等待补传"""
+    pending = get_pending_uploads(journal, job_id)
+    if not pending:
+        return 0
+
+    # 选择上传目标（已选择过的任务沿用之前的表格，避免重复建表）
+    target = get_job(journal, job_id)["upload_target"]
+    if target:
+        target = ensure_table_fields(journal, job_id, target, token)
+    else:
+        app_token = config.get('app_token')
+        if app_token:
+            target = choose_upload_target(journal, job_id, app_token, token)
+        else:
+            print("❌ 配置文件缺少 app_token")
+
+    if not target:
+        print_pending_hint(job_id, len(pending))
+        return 0
+
+    # 既没有简介也没有摘要的记录永远无法上传，标记失败后移出队列
+    rejected = [item["path"] for item in pending if "简介" not in item["record"] and "摘要" not in item["record"]]
+    if rejected:
+        print(f"⚠️ {len(rejected)} 条记录缺少简介和摘要字段，已标记为失败")
+        if not mark_upload_rejected(journal, job_id, rejected, "缺少简介和摘要字段"):
+            return 0
+        pending = [item for item in pending if item["path"] not in rejected]
+
+    uploader = add_records_to_wiki_table if target["type"] == "wiki" else add_records_to_bitable
+
+    uploaded = 0
+    for start in range(0, len(pending), UPLOAD_BATCH_SIZE):
+        batch = pending[start:start + UPLOAD_BATCH_SIZE]
+        paths = [item["path"] for item in batch]
+        records = [item["record"] for item in batch]
+
+        # 只有整批都被接受才移出队列，否则整批保留等待补传
+        success_count = uploader(target["app_token"], target["table_id"], token, records)
+        if success_count == len(records):
+            if not mark_uploaded(journal, job_id, paths):
+                print("⚠️ 上传结果未能写入任务日志，已停止上传")
+                return uploaded
+            uploaded += len(batch)
         else:
-            print("❌ 数据上传失败")
-    
+            if success_count:
+                print(f"⚠️ 本批仅上传 {success_count}/{len(records)} 条记录，整批保留在待上传队列中")
+            if not mark_upload_failed(journal, job_id, paths, "上传记录失败"):
+                return uploaded
+
+    remaining = len(pending) - uploaded
+    if remaining:
+        print_pending_hint(job_id, remaining)
+    return uploaded
+
+def upload_pending(journal, config, job_id=None):
+    """补传待上传队列中的记录，不重新提取文件"""
+    pending = get_pending_uploads(journal, job_id)
+    if not pending:
+        print("✅ 没有待上传的记录")
+        return
+
+    print(f"📤 待上传记录 {len(pending)} 条")
+
+    print("\n🔑 获取飞书访问令牌...")
+    token = get_tenant_access_token(config['app_id'], config['app_secret'])
+    if not token:
+        print("❌ 获取访问令牌失败")
+        return
+
+    uploaded = 0
+    for pending_job_id in dict.fromkeys(item["job_id"] for item in pending):
+        uploaded += upload_job_records(journal, pending_job_id, token, config)
+
+    print(f"\n📊 本次补传成功 {uploaded} 条记录")
+
+def extract_job_files(journal, job_id, job_files):
+    """提取任务中尚未成功提取的文件，每个文件处理完即写入任务日志
+
+    返回(提取结果列表, 对应文件路径列表)；任务日志写入失败时停止处理并返回None。
+    """
+    # 打开本地全文索引（每提取完一个文件即写入）
+    index_conn = open_index()
+    indexed_count = 0
+
+    # 已提取的文件直接使用日志中保存的结果
+    results = []
+    extracted_paths = []
+
+    try:
+        for job_file in job_files:
+            file_path = job_file["path"]
+
+            if job_file["state"] not in (STATE_DISCOVERED, STATE_FAILED):
+                results.append(job_file["record"])
+                extracted_paths.append(file_path)
+                continue
+
+            print(f"\n📄 正在处理: {os.path.basename(file_path)}")
+
+            # 根据文件类型选择解析器
+            extractor = get_file_extractor(file_path)
+            if not extractor:
+                print(f"❌ 不支持的文件类型: {os.path.splitext(file_path)[1]}")
+                if not mark_file_failed(journal, job_id, file_path, "不支持的文件类型"):
+                    return None
+                continue
+
+            # 提取文件信息
+            try:
+                file_info = extractor(file_path)
+            except Exception as e:
+                print(f"❌ 处理文件时出错: {str(e)}")
+                if not mark_file_failed(journal, job_id, file_path, str(e)):
+                    return None
+                continue
+
+            if not file_info:
+                print(f"❌ 无法提取信息")
+                if not mark_file_failed(journal, job_id, file_path, "无法提取信息"):
+                    return None
+                continue
+
+            if not mark_file_extracted(journal, job_id, file_path, file_info):
+                return None
+            results.append(file_info)
+            extracted_paths.append(file_path)
+            print(f"✅ 成功提取信息")
+            if index_conn and index_record(index_conn, file_path, file_info):
+                indexed_count += 1
+    finally:
+        if index_conn:
+            index_conn.close()
+        if indexed_count:
+            print(f"\n🔍 {indexed_count} 条提取结果已写入本地全文索引，可运行 python search_index.py <关键词> 检索")
+
+    return results, extracted_paths
+
+def run_job(journal, config, resume_job_id=None):
+    """提取并上传一个任务；每个文件处理完即写入任务日志，中断后可从检查点继续"""
+    if resume_job_id:
+        job_id = resume_job_id
+        if not get_job(journal, job_id):
+            print(f"❌ 任务不存在: {job_id}")
+            return
+        print(f"🔁 继续任务 {job_id}")
     else:
-        # 上传到知识库表格
-        print("\n📚 上传到飞书知识库表格...")
-        
-        # 获取现有表格列表
-        tables = get_existing_tables(token)
-        if not tables:
-            print("❌ 获取知识库表格列表失败")
+        # 选择文件或文件夹
+        files_to_process = select_files()
+        if not files_to_process:
+            print("❌ 未选择任何文件")
             return
-        
-        # 选择表格
-        print("\n📋 可用表格列表：")
-        for i, table in enumerate(tables, 1):
-            print(f"{i}. {table['name']}")
-        
-        try:
-            choice = int(input("\n请选择要上传的表格编号: ")) - 1
-            if 0 <= choice < len(tables):
-                selected_table = tables[choice]
-                
-                # 添加记录到知识库表格
-                if add_records_to_wiki_table(token, selected_table['token'], results):
-                    print("✅ 数据上传成功")
-                else:
-                    print("❌ 数据上传失败")
-            else:
-                print("❌ 无效的选择")
-        except ValueError:
-            print("❌ 请输入有效的数字")
+
+        job_id = create_job(journal, files_to_process)
+        if not job_id:
+            return
+        print(f"🗂️ 任务ID: {job_id}（中断后可运行 python create_feishu_table.py --resume {job_id} 继续）")
+
+    job_files = get_job_files(journal, job_id)
+    if all(job_file["state"] == STATE_UPLOADED for job_file in job_files):
+        print(f"✅ 任务 {job_id} 的所有文件均已提取并上传")
+        return
+
+    extracted = extract_job_files(journal, job_id, job_files)
+    if extracted is None:
+        print(f"⚠️ 任务日志写入失败，已停止处理，可稍后运行 python create_feishu_table.py --resume {job_id} 继续")
+        return
+    results, extracted_paths = extracted
+
+    if not results:
+        print("❌ 没有成功处理任何文件")
+        print(f"可运行 python create_feishu_table.py --resume {job_id} 重试")
+        return
+
+    # 保存到CSV文件（同一任务恢复时覆盖写入同一文件）
+    csv_filename = f"PDF提取结果_{job_id}.csv"
+
+    df = pd.DataFrame(results)
+    df.to_csv(csv_filename, index=False, encoding='utf-8-sig')
+    print(f"\n💾 结果已保存到: {csv_filename}")
+
+    # 写入CSV后立即加入待上传队列，之后任何一步失败都可以补传
+    if not mark_files_written(journal, job_id, extracted_paths, csv_filename) or not enqueue_uploads(journal, job_id):
+        print(f"⚠️ 任务日志写入失败，已停止处理，可稍后运行 python create_feishu_table.py --resume {job_id} 继续")
+        return
+
+    pending_count = len(get_pending_uploads(journal, job_id))
+    if not pending_count:
+        print("✅ 所有记录均已上传")
+        return
+
+    # 获取访问令牌
+    print("\n🔑 获取飞书访问令牌...")
+    token = get_tenant_access_token(config['app_id'], config['app_secret'])
+    if not token:
+        print("❌ 获取访问令牌失败")
+        print_pending_hint(job_id, pending_count)
+        return
+
+    # 分批上传
+    upload_job_records(journal, job_id, token, config)
+    if get_pending_uploads(journal, job_id):
+        print("❌ 数据上传失败")
+    else:
+        print("✅ 数据上传成功")
+
+def main():
+    """主函数 - 程序入口点"""
+    parser = argparse.ArgumentParser(description="提取PDF和Word文件信息并上传到飞书表格")
+    parser.add_argument("command", nargs="?", choices=["upload-pending"],
+                        help="upload-pending：补传上传失败的记录，不重新提取")
+    parser.add_argument("--resume", metavar="JOB", help="从上次中断处继续指定任务")
+    parser.add_argument("--job", metavar="JOB", help="upload-pending 时只补传指定任务")
+    args = parser.parse_args()
+
+    # 检查并读取配置
+    config = load_config()
+    if not config:
+        return
+
+    journal = open_journal()
+    if not journal:
+        return
+
+    with closing(journal):
+        if args.command == "upload-pending":
+            upload_pending(journal, config, args.job)
+        else:
+            run_job(journal, config, args.resume)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -69,8 +69,16 @@ def create_bitable_table(app_token: str, table_id: str, tenant_access_token: str
         }
     ]
     
+    # 已存在的字段直接跳过，便于在同一张表上重试创建字段
+    existing_fields = {field.get("field_name") for field in get_table_fields(app_token, table_id, tenant_access_token)}
+    
     success_count = 0
     for field in fields:
+        if field["field_name"] in existing_fields:
+            success_count += 1
+            print(f"✅ 字段 '{field['field_name']}' 已存在")
+            continue
+        
         try:
             response = requests.post(url, headers=headers, json=field)
             response.raise_for_status()
@@ -157,4 +165,23 @@ def get_existing_tables(app_token: str, tenant_access_token: str) -> list:
             return []
     except Exception as e:
         print(f"❌ 获取表格列表出错: {e}")
+        return []
+
+def get_table_fields(app_token: str, table_id: str, tenant_access_token: str) -> list:
+    """获取数据表现有的字段列表"""
+    url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields"
+    headers = {"Authorization": f"Bearer {tenant_access_token}"}
+    
+    try:
+        response = requests.get(url, headers=headers)
+        response.raise_for_status()
+        result = response.json()
+        
+        if result.get("code") == 0:
+            return result.get("data", {}).get("items", [])
+        else:
+            print(f"❌ 获取字段列表失败: {result.get('msg', 'Unknown error')}")
+            return []
+    except Exception as e:
+        print(f"❌ 获取字段列表出错: {e}")
         return []
\ No newline at end of file
@@ -0,0 +1,260 @@
+import json
+import sqlite3
+from datetime import datetime
+
+DEFAULT_JOURNAL_FILE = "extract_jobs.db"
+
+# 文件处理状态
+STATE_DISCOVERED = "discovered"
+STATE_EXTRACTED = "extracted"
+STATE_WRITTEN = "written"
+STATE_UPLOADED = "uploaded"
+STATE_FAILED = "failed"
+
+
+def _now() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def open_journal(db_path: str = DEFAULT_JOURNAL_FILE):
+    """打开（必要时创建）任务日志库"""
+    try:
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                created_at TEXT,
+                csv_path TEXT,
+                upload_target TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_files (
+                job_id TEXT NOT NULL,
+                path TEXT NOT NULL,
+                state TEXT NOT NULL,
+                record TEXT,
+                error TEXT,
+                updated_at TEXT,
+                PRIMARY KEY (job_id, path)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS pending_uploads (
+                job_id TEXT NOT NULL,
+                path TEXT NOT NULL,
+                record TEXT NOT NULL,
+                attempts INTEGER DEFAULT 0,
+                last_error TEXT,
+                queued_at TEXT,
+                PRIMARY KEY (job_id, path)
+            )
+        """)
+        conn.commit()
+        return conn
+    except sqlite3.Error as e:
+        print(f"❌ 打开任务日志出错: {e}")
+        return None
+
+
+def create_job(conn, files: list) -> str:
+    """创建新任务并登记待处理文件，返回任务ID（同一秒内创建多个任务时追加序号），失败时返回空字符串"""
+    base_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    now = _now()
+    try:
+        with conn:
+            job_id = base_id
+            suffix = 1
+            while conn.execute("SELECT 1 FROM jobs WHERE job_id = ?", (job_id,)).fetchone():
+                suffix += 1
+                job_id = f"{base_id}_{suffix}"
+
+            conn.execute("INSERT INTO jobs (job_id, created_at) VALUES (?, ?)", (job_id, now))
+            conn.executemany(
+                "INSERT OR IGNORE INTO job_files (job_id, path, state, updated_at) VALUES (?, ?, ?, ?)",
+                [(job_id, path, STATE_DISCOVERED, now) for path in files]
+            )
+        return job_id
+    except sqlite3.Error as e:
+        print(f"❌ 创建任务出错: {e}")
+        return ""
+
+
+def get_job(conn, job_id: str) -> dict:
+    """读取任务信息，不存在时返回None"""
+    row = conn.execute(
+        "SELECT job_id, created_at, csv_path, upload_target FROM jobs WHERE job_id = ?",
+        (job_id,)
+    ).fetchone()
+    if not row:
+        return None
+    return {
+        "job_id": row[0],
+        "created_at": row[1],
+        "csv_path": row[2],
+        "upload_target": json.loads(row[3]) if row[3] else None
+    }
+
+
+def get_job_files(conn, job_id: str) -> list:
+    """按登记顺序返回任务中每个文件的状态和已提取的记录"""
+    rows = conn.execute(
+        "SELECT path, state, record, error FROM job_files WHERE job_id = ? ORDER BY rowid",
+        (job_id,)
+    ).fetchall()
+    return [
+        {
+            "path": path,
+            "state": state,
+            "record": json.loads(record) if record else None,
+            "error": error
+        }
+        for path, state, record, error in rows
+    ]
+
+
+def mark_file_extracted(conn, job_id: str, path: str, record: dict) -> bool:
+    """记录文件提取成功（同时保存提取结果，恢复时无需重新解析）"""
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE job_files SET state = ?, record = ?, error = NULL, updated_at = ? WHERE job_id = ? AND path = ?",
+                (STATE_EXTRACTED, json.dumps(record, ensure_ascii=False), _now(), job_id, path)
+            )
+        return True
+    except sqlite3.Error as e:
+        print(f"❌ 写入任务日志出错: {e}")
+        return False
+
+
+def mark_file_failed(conn, job_id: str, path: str, error: str) -> bool:
+    """记录文件提取失败"""
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE job_files SET state = ?, error = ?, updated_at = ? WHERE job_id = ? AND path = ?",
+                (STATE_FAILED, error, _now(), job_id, path)
+            )
+        return True
+    except sqlite3.Error as e:
+        print(f"❌ 写入任务日志出错: {e}")
+        return False
+
+
+def mark_files_written(conn, job_id: str, paths: list, csv_path: str) -> bool:
+    """记录结果已写入CSV文件"""
+    now = _now()
+    try:
+        with conn:
+            conn.execute("UPDATE jobs SET csv_path = ? WHERE job_id = ?", (csv_path, job_id))
+            conn.executemany(
+                "UPDATE job_files SET state = ?, updated_at = ? WHERE job_id = ? AND path = ? AND state = ?",
+                [(STATE_WRITTEN, now, job_id, path, STATE_EXTRACTED) for path in paths]
+            )
+        return True
+    except sqlite3.Error as e:
+        print(f"❌ 写入任务日志出错: {e}")
+        return False
+
+
+def set_upload_target(conn, job_id: str, target: dict) -> bool:
+    """保存任务的上传目标，恢复或补传时复用同一张表，避免重复建表"""
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE jobs SET upload_target = ? WHERE job_id = ?",
+                (json.dumps(target, ensure_ascii=False), job_id)
+            )
+        return True
+    except sqlite3.Error as e:
+        print(f"❌ 写入任务日志出错: {e}")
+        return False
+
+
+def enqueue_uploads(conn, job_id: str) -> bool:
+    """将已写入CSV但尚未上传的记录按登记顺序加入待上传队列"""
+    try:
+        with conn:
+            conn.execute("""
+                INSERT OR IGNORE INTO pending_uploads (job_id, path, record, queued_at)
+                SELECT job_id, path, record, ? FROM job_files
+                WHERE job_id = ? AND state = ?
+                ORDER BY rowid
+            """, (_now(), job_id, STATE_WRITTEN))
+        return True
+    except sqlite3.Error as e:
+        print(f"❌ 写入任务日志出错: {e}")
+        return False
+
+
+def get_pending_uploads(conn, job_id: str = None) -> list:
+    """返回待上传队列中的记录（不指定任务时返回全部任务的记录）"""
+    sql = "SELECT job_id, path, record, attempts, last_error FROM pending_uploads"
+    params = ()
+    if job_id:
+        sql += " WHERE job_id = ?"
+        params = (job_id,)
+    rows = conn.execute(sql + " ORDER BY rowid", params).fetchall()
+    return [
+        {
+            "job_id": row_job_id,
+            "path": path,
+            "record": json.loads(record),
+            "attempts": attempts,
+            "last_error": last_error
+        }
+        for row_job_id, path, record, attempts, last_error in rows
+    ]
+
+
+def mark_uploaded(conn, job_id: str, paths: list) -> bool:
+    """记录上传成功并移出待上传队列"""
+    now = _now()
+    try:
+        with conn:
+            conn.executemany(
+                "DELETE FROM pending_uploads WHERE job_id = ? AND path = ?",
+                [(job_id, path) for path in paths]
+            )
+            conn.executemany(
+                "UPDATE job_files SET state = ?, updated_at = ? WHERE job_id = ? AND path = ?",
+                [(STATE_UPLOADED, now, job_id, path) for path in paths]
+            )
+        return True
+    except sqlite3.Error as e:
+        print(f"❌ 写入任务日志出错: {e}")
+        return False
+
+
+def mark_upload_failed(conn, job_id: str, paths: list, error: str) -> bool:
+    """记录上传失败，记录保留在待上传队列中等待补传"""
+    try:
+        with conn:
+            conn.executemany(
+                "UPDATE pending_uploads SET attempts = attempts + 1, last_error = ? WHERE job_id = ? AND path = ?",
+                [(error, job_id, path) for path in paths]
+            )
+        return True
+    except sqlite3.Error as e:
+        print(f"❌ 写入任务日志出错: {e}")
+        return False
+
+
+def mark_upload_rejected(conn, job_id: str, paths: list, error: str) -> bool:
+    """记录无法上传的记录（如缺少简介和摘要字段）：移出待上传队列并标记文件失败，避免无限重试"""
+    now = _now()
+    try:
+        with conn:
+            conn.executemany(
+                "DELETE FROM pending_uploads WHERE job_id = ? AND path = ?",
+                [(job_id, path) for path in paths]
+            )
+            conn.executemany(
+                "UPDATE job_files SET state = ?, error = ?, updated_at = ? WHERE job_id = ? AND path = ?",
+                [(STATE_FAILED, error, now, job_id, path) for path in paths]
+            )
+        return True
+    except sqlite3.Error as e:
+        print(f"❌ 写入任务日志出错: {e}")
+        return False
@@ -0,0 +1,245 @@
+import os
+import re
+import unicodedata
+import sqlite3
+import argparse
+from datetime import datetime
+
+DEFAULT_INDEX_FILE = "extract_index.db"
+
+# 片段中命中词前后保留的字符数
+SNIPPET_CONTEXT = 30
+
+# 中日韩字符范围（汉字、扩展A、兼容汉字、假名、谚文）
+_CJK_CHARS = r'㐀-䶿一-鿿豈-﫿぀-ヿ가-힯'
+_CJK_RUN_PATTERN = re.compile(f'[{_CJK_CHARS}]+')
+_WORD_PATTERN = re.compile(r'[^\W_]+')
+
+
+def _cjk_tokens(run: str, is_tail: bool = True) -> list:
+    """把一段连续的中日韩字符切成重叠的双字词元
+
+    is_tail为True时在末尾再补一个单字词元，保证每个字都是某个词元的开头，
+    单字查询可以用前缀匹配命中。
+    """
+    tokens = [run[i:i + 2] for i in range(len(run) - 1)]
+    if is_tail or len(run) == 1:
+        tokens.append(run[-1])
+    return tokens
+
+
+def segment_cjk(text: str) -> str:
+    """将中日韩字符切分为重叠双字词元（空格分隔），使unicode61分词器按双字建立索引"""
+    if not text:
+        return ""
+    return _CJK_RUN_PATTERN.sub(lambda m: " " + " ".join(_cjk_tokens(m.group())) + " ", text)
+
+
+def _term_to_phrase(term: str) -> str:
+    """把单个关键词转换为与segment_cjk词元序列一致的FTS5短语
+
+    关键词末尾的中日韩字符在原文中可能还连着其它字，因此不补末尾单字；
+    末尾只有一个字时用前缀匹配。
+    """
+    parts = []
+    pos = 0
+    for match in _CJK_RUN_PATTERN.finditer(term):
+        parts.extend(f'"{word}"' for word in _WORD_PATTERN.findall(term[pos:match.start()]))
+        run = match.group()
+        pos = match.end()
+        at_end = not _WORD_PATTERN.search(term[pos:])
+        if at_end and len(run) == 1:
+            parts.append(f'"{run}" *')
+        else:
+            parts.extend(f'"{token}"' for token in _cjk_tokens(run, is_tail=not at_end))
+    parts.extend(f'"{word}"' for word in _WORD_PATTERN.findall(term[pos:]))
+    return " + ".join(parts)
+
+
+def build_match_query(query: str) -> str:
+    """把用户输入转换为FTS5查询：按空白拆分关键词，每个关键词作为短语匹配，多个关键词取交集"""
+    phrases = [_term_to_phrase(term) for term in query.split()]
+    return " AND ".join(phrase for phrase in phrases if phrase)
+
+
+def _normalize_char(char: str) -> str:
+    """按unicode61分词器的规则归一化单个字符：去掉变音符号并转小写，分隔符返回空串"""
+    char = "".join(c for c in unicodedata.normalize("NFKD", char) if not unicodedata.combining(c))
+    return "".join(c for c in char.casefold() if c.isalnum())
+
+
+def _make_snippet(text: str, terms: list) -> str:
+    """从原文中截取首个命中词附近的片段，并用【】标出关键词
+
+    原文与关键词都按分词器规则归一化后再查找（忽略大小写、变音符号和分隔符），
+    找不到命中位置时返回空串。
+    """
+    normalized = []
+    offsets = []
+    for i, char in enumerate(text):
+        for c in _normalize_char(char):
+            normalized.append(c)
+            offsets.append(i)
+    normalized = "".join(normalized)
+
+    spans = []
+    for term in terms:
+        needle = "".join(_normalize_char(c) for c in term)
+        start = normalized.find(needle) if needle else -1
+        while start != -1:
+            end = start + len(needle)
+            spans.append((offsets[start], offsets[end - 1] + 1))
+            start = normalized.find(needle, end)
+
+    if not spans:
+        return ""
+
+    first = min(spans)[0]
+    start = max(0, first - SNIPPET_CONTEXT)
+    end = min(len(text), first + SNIPPET_CONTEXT * 2)
+
+    pieces = []
+    cursor = start
+    for span_start, span_end in sorted(spans):
+        if span_start < cursor or span_end > end:
+            continue
+        pieces.append(text[cursor:span_start])
+        pieces.append(f"【{text[span_start:span_end]}】")
+        cursor = span_end
+    pieces.append(text[cursor:end])
+    snippet = re.sub(r'\s+', ' ', "".join(pieces)).strip()
+
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+
+def open_index(db_path: str = DEFAULT_INDEX_FILE):
+    """打开（必要时创建）本地全文索引库"""
+    try:
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY,
+                source TEXT UNIQUE NOT NULL,
+                intro TEXT,
+                abstract TEXT,
+                indexed_at TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5(
+                intro, abstract,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '1'
+            )
+        """)
+        conn.commit()
+        return conn
+    except sqlite3.Error as e:
+        print(f"❌ 打开全文索引出错: {e}")
+        return None
+
+
+def index_record(conn, source: str, record: dict) -> bool:
+    """写入或更新一条提取结果（同一来源文件重复索引时覆盖旧记录）"""
+    intro = record.get("简介", "") or ""
+    abstract = record.get("摘要", "") or ""
+    indexed_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    try:
+        with conn:
+            row = conn.execute("SELECT id FROM records WHERE source = ?", (source,)).fetchone()
+            if row:
+                record_id = row[0]
+                conn.execute("DELETE FROM records_fts WHERE rowid = ?", (record_id,))
+                conn.execute(
+                    "UPDATE records SET intro = ?, abstract = ?, indexed_at = ? WHERE id = ?",
+                    (intro, abstract, indexed_at, record_id)
+                )
+            else:
+                cursor = conn.execute(
+                    "INSERT INTO records (source, intro, abstract, indexed_at) VALUES (?, ?, ?, ?)",
+                    (source, intro, abstract, indexed_at)
+                )
+                record_id = cursor.lastrowid
+            conn.execute(
+                "INSERT INTO records_fts (rowid, intro, abstract) VALUES (?, ?, ?)",
+                (record_id, segment_cjk(intro), segment_cjk(abstract))
+            )
+        return True
+    except sqlite3.Error as e:
+        print(f"❌ 写入全文索引出错: {e}")
+        return False
+
+
+def search_index(conn, query: str, limit: int = 20) -> list:
+    """全文检索简介和摘要，按bm25相关度排序返回匹配记录"""
+    match_query = build_match_query(query)
+    if not match_query:
+        return []
+
+    sql = """
+        SELECT r.source, r.intro, r.abstract
+        FROM records_fts
+        JOIN records r ON r.id = records_fts.rowid
+        WHERE records_fts MATCH ?
+        ORDER BY bm25(records_fts)
+        LIMIT ?
+    """
+    try:
+        rows = conn.execute(sql, (match_query, limit)).fetchall()
+    except sqlite3.Error as e:
+        print(f"❌ 全文检索出错: {e}")
+        return []
+
+    terms = query.split()
+    results = []
+    for source, intro, abstract in rows:
+        intro = intro or ""
+        abstract = abstract or ""
+        snippet = _make_snippet(abstract, terms) or _make_snippet(intro, terms)
+        if not snippet:
+            # 命中位置无法在原文中定位时退回显示开头
+            text = re.sub(r'\s+', ' ', abstract or intro).strip()
+            snippet = text[:SNIPPET_CONTEXT * 2] + ("…" if len(text) > SNIPPET_CONTEXT * 2 else "")
+        results.append({
+            "source": source,
+            "简介": intro,
+            "摘要": abstract,
+            "snippet": snippet
+        })
+    return results
+
+
+def main():
+    """命令行查询入口"""
+    parser = argparse.ArgumentParser(description="检索已提取的简介和摘要")
+    parser.add_argument("query", nargs="+", help="关键词（多个关键词需同时匹配）")
+    parser.add_argument("--db", default=DEFAULT_INDEX_FILE, help="索引库路径")
+    parser.add_argument("-n", "--limit", type=int, default=20, help="最多返回的结果数")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ 索引库不存在: {args.db}")
+        return
+
+    conn = open_index(args.db)
+    if not conn:
+        return
+
+    results = search_index(conn, " ".join(args.query), args.limit)
+    conn.close()
+
+    if not results:
+        print("未找到匹配记录")
+        return
+
+    print(f"🔍 找到 {len(results)} 条匹配记录\n")
+    for i, result in enumerate(results, 1):
+        print(f"{i}. {os.path.basename(result['source'])}")
+        print(f"   {result['snippet']}\n")
+
+
+if __name__ == "__main__":
+    main()
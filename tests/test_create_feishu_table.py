@@ -0,0 +1,135 @@
+import pytest
+
+import create_feishu_table
+from job_journal import (
+    STATE_UPLOADED,
+    STATE_FAILED,
+    open_journal,
+    create_job,
+    enqueue_uploads,
+    get_job,
+    get_job_files,
+    get_pending_uploads,
+    set_upload_target
+)
+
+CONFIG = {"app_id": "id", "app_secret": "secret", "app_token": "app"}
+TARGET = {"type": "bitable", "app_token": "app", "table_id": "tbl"}
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    # CSV和全文索引写在临时目录中
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(create_feishu_table, "get_tenant_access_token", lambda app_id, app_secret: "token")
+    conn = open_journal(str(tmp_path / "jobs.db"))
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def extracted(monkeypatch):
+    calls = []
+
+    def extractor(file_path):
+        calls.append(file_path)
+        return {"简介": file_path, "摘要": "摘要"}
+
+    monkeypatch.setattr(create_feishu_table, "get_file_extractor", lambda file_path: extractor)
+    return calls
+
+
+def use_uploader(monkeypatch, accept):
+    """替换多维表格上传函数，accept(records)返回飞书接受的记录数"""
+    batches = []
+
+    def uploader(app_token, table_id, token, records):
+        batches.append([record["简介"] for record in records])
+        return accept(records)
+
+    monkeypatch.setattr(create_feishu_table, "add_records_to_bitable", uploader)
+    return batches
+
+
+def test_resume_skips_extracted_files(journal, extracted, monkeypatch):
+    files = ["/a.pdf", "/b.pdf", "/c.pdf"]
+    monkeypatch.setattr(create_feishu_table, "select_files", lambda: files)
+    monkeypatch.setattr(create_feishu_table, "get_tenant_access_token", lambda app_id, app_secret: "")
+
+    create_feishu_table.run_job(journal, CONFIG)
+    job_id = journal.execute("SELECT job_id FROM jobs").fetchone()[0]
+    assert extracted == files
+    assert [item["path"] for item in get_pending_uploads(journal, job_id)] == files
+
+    set_upload_target(journal, job_id, TARGET)
+    batches = use_uploader(monkeypatch, len)
+    monkeypatch.setattr(create_feishu_table, "get_tenant_access_token", lambda app_id, app_secret: "token")
+    extracted.clear()
+
+    create_feishu_table.run_job(journal, CONFIG, job_id)
+    assert extracted == []
+    assert batches == [files]
+    assert {job_file["state"] for job_file in get_job_files(journal, job_id)} == {STATE_UPLOADED}
+
+
+def test_upload_pending_drains_only_failed_batches(journal, extracted, monkeypatch):
+    files = ["/a.pdf", "/b.pdf", "/c.pdf", "/d.pdf"]
+    monkeypatch.setattr(create_feishu_table, "select_files", lambda: files)
+    monkeypatch.setattr(create_feishu_table, "choose_upload_target",
+                        lambda journal, job_id, app_token, token: set_upload_target(journal, job_id, TARGET) and TARGET)
+    monkeypatch.setattr(create_feishu_table, "UPLOAD_BATCH_SIZE", 2)
+
+    # 第二批上传失败
+    use_uploader(monkeypatch, lambda records: 0 if "/c.pdf" in [r["简介"] for r in records] else len(records))
+    create_feishu_table.run_job(journal, CONFIG)
+    job_id = journal.execute("SELECT job_id FROM jobs").fetchone()[0]
+    assert [item["path"] for item in get_pending_uploads(journal, job_id)] == ["/c.pdf", "/d.pdf"]
+
+    batches = use_uploader(monkeypatch, len)
+    create_feishu_table.upload_pending(journal, CONFIG)
+    assert batches == [["/c.pdf", "/d.pdf"]]
+    assert get_pending_uploads(journal, job_id) == []
+
+
+def test_partial_upload_keeps_batch_queued(journal, monkeypatch):
+    job_id = create_job(journal, ["/a.pdf", "/b.pdf"])
+    journal.execute("UPDATE job_files SET state = 'written', record = '{\"简介\": \"x\"}'")
+    journal.execute("UPDATE job_files SET record = '{}' WHERE path = '/b.pdf'")
+    journal.commit()
+    set_upload_target(journal, job_id, TARGET)
+    enqueue_uploads(journal, job_id)
+
+    use_uploader(monkeypatch, lambda records: 0)
+    create_feishu_table.upload_pending(journal, CONFIG)
+
+    # 缺少字段的记录标记失败并移出队列，上传失败的记录保留
+    pending = get_pending_uploads(journal, job_id)
+    assert [item["path"] for item in pending] == ["/a.pdf"]
+    assert pending[0]["attempts"] == 1
+    assert get_job_files(journal, job_id)[1]["state"] == STATE_FAILED
+
+
+def test_field_creation_retries_on_same_table(journal, monkeypatch):
+    job_id = create_job(journal, ["/a.pdf"])
+    journal.execute("UPDATE job_files SET state = 'written', record = '{\"简介\": \"x\"}'")
+    journal.commit()
+    enqueue_uploads(journal, job_id)
+
+    created_tables = []
+    field_results = iter([False, True])
+    monkeypatch.setattr(create_feishu_table, "Tk", lambda: type("Root", (), {"withdraw": lambda self: None, "destroy": lambda self: None})())
+    monkeypatch.setattr(create_feishu_table.messagebox, "askquestion", lambda *args, **kwargs: "yes")
+    monkeypatch.setattr(create_feishu_table, "create_new_bitable",
+                        lambda app_token, token, name: created_tables.append("tbl") or "tbl")
+    monkeypatch.setattr(create_feishu_table, "create_table_fields",
+                        lambda app_token, table_id, token: next(field_results))
+    batches = use_uploader(monkeypatch, len)
+
+    create_feishu_table.upload_pending(journal, CONFIG)
+    assert get_job(journal, job_id)["upload_target"]["table_id"] == "tbl"
+    assert batches == []
+
+    create_feishu_table.upload_pending(journal, CONFIG)
+    assert created_tables == ["tbl"]
+    assert batches == [["x"]]
+    assert get_job(journal, job_id)["upload_target"]["fields_created"] is True
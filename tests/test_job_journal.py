@@ -0,0 +1,94 @@
+import sqlite3
+
+import pytest
+
+from job_journal import (
+    STATE_DISCOVERED,
+    STATE_EXTRACTED,
+    STATE_WRITTEN,
+    STATE_UPLOADED,
+    STATE_FAILED,
+    open_journal,
+    create_job,
+    get_job_files,
+    mark_file_extracted,
+    mark_file_failed,
+    mark_files_written,
+    enqueue_uploads,
+    get_pending_uploads,
+    mark_uploaded,
+    mark_upload_failed,
+    mark_upload_rejected
+)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    conn = open_journal(str(tmp_path / "jobs.db"))
+    yield conn
+    conn.close()
+
+
+def states(journal, job_id):
+    return {job_file["path"]: job_file["state"] for job_file in get_job_files(journal, job_id)}
+
+
+def test_file_state_transitions(journal):
+    job_id = create_job(journal, ["/z.pdf", "/a.pdf"])
+    assert states(journal, job_id) == {"/z.pdf": STATE_DISCOVERED, "/a.pdf": STATE_DISCOVERED}
+
+    assert mark_file_extracted(journal, job_id, "/z.pdf", {"简介": "z", "摘要": "z"})
+    assert mark_file_extracted(journal, job_id, "/a.pdf", {"简介": "a", "摘要": "a"})
+    assert states(journal, job_id) == {"/z.pdf": STATE_EXTRACTED, "/a.pdf": STATE_EXTRACTED}
+
+    assert mark_files_written(journal, job_id, ["/z.pdf", "/a.pdf"], "out.csv")
+    assert states(journal, job_id) == {"/z.pdf": STATE_WRITTEN, "/a.pdf": STATE_WRITTEN}
+
+    assert enqueue_uploads(journal, job_id)
+    assert enqueue_uploads(journal, job_id)
+    pending = get_pending_uploads(journal, job_id)
+    assert [item["path"] for item in pending] == ["/z.pdf", "/a.pdf"]
+    assert pending[0]["record"] == {"简介": "z", "摘要": "z"}
+
+    assert mark_upload_failed(journal, job_id, ["/z.pdf"], "上传记录失败")
+    assert get_pending_uploads(journal, job_id)[0]["attempts"] == 1
+
+    assert mark_uploaded(journal, job_id, ["/z.pdf", "/a.pdf"])
+    assert get_pending_uploads(journal, job_id) == []
+    assert states(journal, job_id) == {"/z.pdf": STATE_UPLOADED, "/a.pdf": STATE_UPLOADED}
+
+
+def test_rejected_upload_leaves_queue(journal):
+    job_id = create_job(journal, ["/a.pdf"])
+    mark_file_extracted(journal, job_id, "/a.pdf", {})
+    mark_files_written(journal, job_id, ["/a.pdf"], "out.csv")
+    enqueue_uploads(journal, job_id)
+
+    assert mark_upload_rejected(journal, job_id, ["/a.pdf"], "缺少简介和摘要字段")
+    assert get_pending_uploads(journal, job_id) == []
+    assert get_job_files(journal, job_id)[0]["state"] == STATE_FAILED
+
+
+def test_jobs_created_in_same_second_get_unique_ids(journal):
+    first = create_job(journal, ["/a.pdf"])
+    second = create_job(journal, ["/a.pdf"])
+
+    assert first and second and first != second
+
+
+def test_write_errors_are_reported_not_raised(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    journal = open_journal(db_path)
+    job_id = create_job(journal, ["/a.pdf"])
+
+    # 另一个连接持有写锁时，写入应返回False而不是抛出异常
+    journal.execute("PRAGMA busy_timeout = 0")
+    locker = sqlite3.connect(db_path)
+    locker.execute("BEGIN IMMEDIATE")
+    try:
+        assert mark_file_extracted(journal, job_id, "/a.pdf", {"简介": "a"}) is False
+        assert mark_file_failed(journal, job_id, "/a.pdf", "error") is False
+    finally:
+        locker.rollback()
+        locker.close()
+        journal.close()
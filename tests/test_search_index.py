@@ -0,0 +1,71 @@
+import pytest
+
+from search_index import open_index, index_record, search_index, segment_cjk, build_match_query
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = open_index(str(tmp_path / "index.db"))
+    yield conn
+    conn.close()
+
+
+def sources(results):
+    return [result["source"] for result in results]
+
+
+def test_segment_cjk_bigrams():
+    assert segment_cjk("针灸疼痛").split() == ["针灸", "灸疼", "疼痛", "痛"]
+    assert segment_cjk("MRI检查").split() == ["MRI", "检查", "查"]
+
+
+def test_build_match_query():
+    assert build_match_query("针灸疼痛") == '"针灸" + "灸疼" + "疼痛"'
+    assert build_match_query("针") == '"针" *'
+    assert build_match_query("检查MRI 疼痛") == '"检查" + "查" + "MRI" AND "疼痛"'
+
+
+def test_reindex_same_source_replaces_record(conn):
+    assert index_record(conn, "/a.pdf", {"简介": "针灸研究", "摘要": "旧摘要"})
+    assert index_record(conn, "/a.pdf", {"简介": "中医药", "摘要": "新摘要"})
+
+    assert conn.execute("SELECT COUNT(*) FROM records").fetchone()[0] == 1
+    assert search_index(conn, "针灸") == []
+    assert sources(search_index(conn, "新摘要")) == ["/a.pdf"]
+
+
+def test_multi_term_query_requires_all_terms(conn):
+    index_record(conn, "/a.pdf", {"简介": "针灸治疗", "摘要": "缓解疼痛"})
+    index_record(conn, "/b.pdf", {"简介": "针灸治疗", "摘要": "改善睡眠"})
+    index_record(conn, "/c.pdf", {"简介": "药物治疗", "摘要": "缓解疼痛"})
+
+    assert sources(search_index(conn, "针灸 疼痛")) == ["/a.pdf"]
+    assert sorted(sources(search_index(conn, "针灸"))) == ["/a.pdf", "/b.pdf"]
+
+
+def test_phrase_does_not_cross_punctuation(conn):
+    index_record(conn, "/a.pdf", {"简介": "针灸，疼痛的研究", "摘要": ""})
+    index_record(conn, "/b.pdf", {"简介": "针灸疼痛治疗", "摘要": ""})
+
+    assert sources(search_index(conn, "针灸疼痛")) == ["/b.pdf"]
+
+
+def test_single_character_query_matches_anywhere_in_word(conn):
+    index_record(conn, "/a.pdf", {"简介": "临床研究", "摘要": ""})
+
+    assert sources(search_index(conn, "临")) == ["/a.pdf"]
+    assert sources(search_index(conn, "究")) == ["/a.pdf"]
+
+
+def test_snippet_follows_tokenizer_normalization(conn):
+    index_record(conn, "/a.pdf", {"简介": "", "摘要": "Café study on COVID 19 patients"})
+
+    assert search_index(conn, "cafe")[0]["snippet"].startswith("【Café】")
+    assert "【COVID 19】" in search_index(conn, "covid-19")[0]["snippet"]
+
+
+def test_snippet_keeps_original_spacing(conn):
+    index_record(conn, "/a.pdf", {"简介": "临床研究 更新", "摘要": "使用 MRI 检查"})
+
+    assert search_index(conn, "MRI")[0]["snippet"] == "使用 【MRI】 检查"
+    assert search_index(conn, "更新")[0]["snippet"] == "临床研究 【更新】"